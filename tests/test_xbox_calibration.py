@@ -0,0 +1,192 @@
+import json
+import random
+
+import pytest
+
+import xbox_calibration
+from xbox_calibration import (AxisCalibration, compute_calibration, calibration_matches, calibrate_joystick,
+                              load_cached_calibration, save_cached_calibration, device_key,
+                              DEADZONE_MARGIN, MAX_DEADZONE)
+
+pytest.importorskip('numpy')
+
+
+class FakeJoystick:
+    """Control en reposo: cada eje vale su reposo más ruido uniforme de amplitud noise."""
+
+    def __init__(self, rests, noise=0.002, guid='030000005e040000', seed=0):
+        self.rests = list(rests)
+        self.noise = noise
+        self.guid = guid
+        self.rng = random.Random(seed)
+
+    def get_numaxes(self):
+        return len(self.rests)
+
+    def get_axis(self, index):
+        return self.rests[index] + self.rng.uniform(-self.noise, self.noise)
+
+    def get_name(self):
+        return 'Xbox Controller'
+
+    def get_guid(self):
+        return self.guid
+
+
+# Sticks 0-3 casi centrados, gatillos 4 y 5 sueltos
+RESTS = [0.02, -0.01, 0.0, 0.03, -1.0, -0.98]
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'calibration.json')
+
+
+def calibrate(joystick, cache_path, **kwargs):
+    return calibrate_joystick(joystick, duration=0.02, rate=1000, use_cache=True, cache_path=cache_path, **kwargs)
+
+
+def test_compute_calibration():
+    samples = [[0.1, -1.0, 0.0], [0.12, -1.0, 0.5], [0.08, -0.99, -0.5]]
+    calibration = compute_calibration(samples)
+    assert calibration.offsets == pytest.approx([0.1, -1.0, 0.0])
+    assert calibration.noise == pytest.approx([0.02, 0.01, 0.5])
+    assert calibration.deadzones == pytest.approx([0.02 * DEADZONE_MARGIN, 0.01 * DEADZONE_MARGIN, 0.5 * DEADZONE_MARGIN])
+    assert calibration.stable == [True, True, 0.5 * DEADZONE_MARGIN <= MAX_DEADZONE]
+
+
+def test_deadzone_only_widens_fixed_threshold():
+    calibration = AxisCalibration([0.05, 0.0], [0.002, 0.15], [0.004, 0.3], [True, True])
+    assert calibration.deadzone(0, 0.2) == 0.2
+    assert calibration.deadzone(1, 0.2) == pytest.approx(0.3)
+    assert calibration.center(0, 0.25) == pytest.approx(0.2)
+
+
+def test_unstable_axis_uses_defaults():
+    calibration = AxisCalibration([0.3, -0.9], [0.4, 0.4], [0.8, 0.8], [False, False])
+    assert calibration.center(0, 0.5) == 0.5
+    assert calibration.deadzone(0, 0.2) == 0.2
+    assert calibration.trigger_rest(1) == -1.0
+    assert calibration.trigger_deadzone(1, 0.05) == 0.05
+
+
+def test_trigger_rest_and_deadzone():
+    # Reposo -0.9: la zona muerta medida (0.22 en eje) se normaliza al recorrido restante (1.9)
+    calibration = AxisCalibration([-0.9, -0.98], [0.11, 0.001], [0.22, 0.002], [True, True])
+    assert calibration.trigger_rest(0) == pytest.approx(-0.9)
+    assert calibration.trigger_deadzone(0, 0.05) == pytest.approx(0.22 / 1.9)
+    assert calibration.trigger_deadzone(1, 0.05) == 0.05
+
+
+def test_trigger_rest_above_max_rest_is_ignored():
+    # SDL reporta 0.0 hasta la primera pulsación: no es un reposo válido
+    calibration = AxisCalibration([0.0], [0.0], [0.0], [True])
+    assert calibration.trigger_rest(0) == -1.0
+    assert calibration.trigger_deadzone(0, 0.1) == 0.1
+
+
+def test_uncalibrated():
+    calibration = AxisCalibration.uncalibrated(6)
+    assert calibration.deadzone(2, 0.2) == 0.2
+    assert calibration.trigger_rest(4) == -1.0
+
+
+def test_mismatched_lengths_rejected():
+    with pytest.raises(ValueError):
+        AxisCalibration([0.0, 0.0], [0.0], [0.0], [True])
+
+
+def test_calibration_matches():
+    calibration = AxisCalibration([0.0, 0.5, -1.0], [0.01, 0.01, 0.01], [0.02, 0.02, 0.02], [True, False, True])
+    assert calibration_matches(calibration, [[0.005, 0.0, -1.0], [-0.005, 0.0, -0.99]])
+    # Eje inestable: no se compara
+    assert calibration_matches(calibration, [[0.0, 0.9, -1.0]])
+    assert not calibration_matches(calibration, [[0.05, 0.5, -1.0]])
+    assert not calibration_matches(calibration, [[0.0, 0.5]])
+
+
+def test_cache_roundtrip(cache_path):
+    joystick = FakeJoystick(RESTS)
+    calibration, from_cache = calibrate(joystick, cache_path)
+    assert not from_cache and all(calibration.stable)
+
+    cached, from_cache = calibrate(joystick, cache_path)
+    assert from_cache
+    assert cached.offsets == pytest.approx(calibration.offsets)
+
+
+def test_unstable_calibration_not_cached(cache_path):
+    joystick = FakeJoystick(RESTS, noise=0.3)
+    calibrate(joystick, cache_path)
+    assert load_cached_calibration(joystick, cache_path) is None
+
+
+def test_recalibrate_ignores_cache(cache_path):
+    joystick = FakeJoystick(RESTS)
+    calibrate(joystick, cache_path)
+    _, from_cache = calibrate(joystick, cache_path, recalibrate=True)
+    assert not from_cache
+
+
+def test_same_model_with_other_rest_recalibrates(cache_path):
+    pad_a = FakeJoystick(RESTS)
+    calibrate(pad_a, cache_path)
+    pad_b = FakeJoystick([0.12] + RESTS[1:], seed=1) # Mismo GUID, stick izquierdo desviado
+    assert device_key(pad_a) == device_key(pad_b)
+
+    calibration, from_cache = calibrate(pad_b, cache_path)
+    assert not from_cache
+    assert calibration.offsets[0] == pytest.approx(0.12, abs=0.01)
+    # La entrada se reemplaza con la del control actual
+    assert load_cached_calibration(pad_b, cache_path).offsets[0] == pytest.approx(0.12, abs=0.01)
+
+
+@pytest.mark.parametrize("contents", [
+    'no es json',
+    '[1, 2]',
+    '"texto"',
+    'null',
+])
+def test_corrupt_cache_file(cache_path, contents):
+    with open(cache_path, 'w') as f:
+        f.write(contents)
+    joystick = FakeJoystick(RESTS)
+    assert load_cached_calibration(joystick, cache_path) is None
+
+    _, from_cache = calibrate(joystick, cache_path)
+    assert not from_cache
+    assert load_cached_calibration(joystick, cache_path) is not None
+
+
+@pytest.mark.parametrize("entry", [
+    {'offsets': [0]},
+    {'offsets': [0.0] * 6, 'noise': [0.0] * 6, 'deadzones': [0.0] * 6, 'stable': ['no'] * 6},
+    {'offsets': [0.0] * 6, 'noise': [0.0] * 6, 'deadzones': [0.0] * 6, 'stable': [1] * 6},
+    {'offsets': ['0.1'] * 6, 'noise': [0.0] * 6, 'deadzones': [0.0] * 6, 'stable': [True] * 6},
+    {'offsets': [0.0] * 6, 'noise': [0.0] * 5, 'deadzones': [0.0] * 6, 'stable': [True] * 6},
+    {'offsets': [0.0] * 4, 'noise': [0.0] * 4, 'deadzones': [0.0] * 4, 'stable': [True] * 4},
+    {'offsets': 0, 'noise': 0, 'deadzones': 0, 'stable': 0},
+    [1, 2],
+    'texto',
+])
+def test_invalid_cache_entry(cache_path, entry):
+    joystick = FakeJoystick(RESTS)
+    with open(cache_path, 'w') as f:
+        json.dump({device_key(joystick): entry}, f)
+    assert load_cached_calibration(joystick, cache_path) is None
+
+
+def test_save_keeps_other_entries(cache_path):
+    other = FakeJoystick(RESTS, guid='otro')
+    joystick = FakeJoystick(RESTS)
+    save_cached_calibration(other, AxisCalibration.uncalibrated(6), cache_path)
+    save_cached_calibration(joystick, AxisCalibration.uncalibrated(6), cache_path)
+    with open(cache_path) as f:
+        assert set(json.load(f)) == {device_key(other), device_key(joystick)}
+
+
+def test_without_numpy_uses_fixed_thresholds(cache_path, monkeypatch):
+    monkeypatch.setattr(xbox_calibration, 'np', None)
+    calibration, from_cache = calibrate(FakeJoystick(RESTS), cache_path)
+    assert not from_cache
+    assert not any(calibration.stable)
@@ -0,0 +1,82 @@
+import pytest
+
+from xbox_control_logic import normalize_trigger, axis_pair_event, trigger_velocity, next_motor_command
+
+INTERVAL = 0.05
+DEBOUNCE = 10
+STOP = 20
+
+
+@pytest.mark.parametrize("value, rest, expected", [
+    (-1.0, -1.0, 0.0),
+    (1.0, -1.0, 1.0),
+    (0.0, -1.0, 0.5),
+    (-0.9, -0.9, 0.0),
+    (-1.0, -0.9, 0.0), # Por debajo del reposo calibrado se recorta a 0
+])
+def test_normalize_trigger(value, rest, expected):
+    assert normalize_trigger(value, rest) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("target, last_sent, elapsed, expected", [
+    # Intervalo mínimo entre comandos
+    (500, 0, INTERVAL - 0.001, (None, None)),
+    (500, 0, INTERVAL, ('motor.run(port.A, 500)', 500)),
+    (0, 500, INTERVAL - 0.001, (None, None)),
+    # STOP solo si el último comando enviado no era 0
+    (0, 0, 1.0, (None, None)),
+    (0, 500, 1.0, ('motor.stop(port.A)', 0)),
+    (STOP, 500, 1.0, ('motor.stop(port.A)', 0)),
+    (-STOP, 0, 1.0, (None, None)),
+    (STOP + 1, 0, 1.0, ('motor.run(port.A, 21)', 21)),
+    # Debounce: hace falta un cambio mayor que DEBOUNCE
+    (500, 500 - DEBOUNCE, 1.0, (None, None)),
+    (500, 500 - DEBOUNCE - 1, 1.0, ('motor.run(port.A, 500)', 500)),
+    (-500, -500 + DEBOUNCE, 1.0, (None, None)),
+    (-500, 500, 1.0, ('motor.run(port.A, -500)', -500)),
+])
+def test_next_motor_command(target, last_sent, elapsed, expected):
+    assert next_motor_command(target, last_sent, elapsed, 'A', INTERVAL, DEBOUNCE, STOP) == expected
+
+
+@pytest.mark.parametrize("left, right, threshold, rests, expected", [
+    (-1.0, -1.0, 0.05, (-1.0, -1.0), 0),
+    (-1.0, 1.0, 0.05, (-1.0, -1.0), 1000),
+    (1.0, -1.0, 0.05, (-1.0, -1.0), -1000),
+    (1.0, 1.0, 0.05, (-1.0, -1.0), 0),
+    (-1.0, -0.92, 0.05, (-1.0, -1.0), 0), # 0.04 normalizado: dentro del umbral
+    (-1.0, 0.0, 0.05, (-1.0, -1.0), 500),
+    (-1.0, 0.0, (0.05, 0.6), (-1.0, -1.0), 0), # Umbral por gatillo
+    (-0.9, -0.9, 0.05, (-0.9, -0.9), 0), # Reposo calibrado
+    (-1.0, 1.0, 0.05, (-0.9, -0.9), 1000),
+])
+def test_trigger_velocity(left, right, threshold, rests, expected):
+    assert trigger_velocity(left, right, threshold, 1000, rests) == expected
+
+
+@pytest.mark.parametrize("last, current, was_active, threshold, expected", [
+    # Sin cambios: nada que mostrar y el estado se conserva
+    ((0.5, 0.0), (0.5, 0.0), True, 0.2, (None, True, (0.5, 0.0))),
+    ((0.0, 0.0), (0.0, 0.0), False, 0.2, (None, False, (0.0, 0.0))),
+    # Fuera de la zona muerta en cualquiera de los ejes
+    ((0.0, 0.0), (0.3, 0.0), False, 0.2, ((0.3, 0.0), True, (0.3, 0.0))),
+    ((0.0, 0.0), (0.0, -0.3), False, 0.2, ((0.0, -0.3), True, (0.0, -0.3))),
+    # Vuelta al reposo: (0.0, 0.0) una sola vez
+    ((0.3, 0.0), (0.1, 0.0), True, 0.2, ((0.0, 0.0), False, (0.1, 0.0))),
+    ((0.1, 0.0), (0.05, 0.0), False, 0.2, (None, False, (0.05, 0.0))),
+    # Zona muerta por eje
+    ((0.0, 0.0), (0.3, 0.0), False, (0.4, 0.1), (None, False, (0.3, 0.0))),
+    ((0.0, 0.0), (0.0, 0.3), False, (0.4, 0.1), ((0.0, 0.3), True, (0.0, 0.3))),
+])
+def test_axis_pair_event(last, current, was_active, threshold, expected):
+    assert axis_pair_event(last, current, was_active, threshold) == expected
+
+
+def test_axis_pair_event_zero_event_only_once():
+    events = []
+    was_active = False
+    last = (0.0, 0.0)
+    for current in [(0.5, 0.0), (0.1, 0.0), (0.05, 0.0), (0.0, 0.0)]:
+        event, was_active, last = axis_pair_event(last, current, was_active, 0.2)
+        events.append(event)
+    assert events == [(0.5, 0.0), (0.0, 0.0), None, None]
@@ -0,0 +1,70 @@
+import os
+import threading
+import tty
+
+import pytest
+import serial
+
+from xbox_spike_serial import tagged_command, parse_reply, send_spike_command
+
+
+def test_tagged_command():
+    assert tagged_command('motor.stop(port.A)') == (b'motor.stop(port.A)\r\n', b'')
+    assert tagged_command('motor.stop(port.A)', 7) == (b'motor.stop(port.A) # 7\r\n', b'# 7\r\n')
+
+
+@pytest.mark.parametrize("response, marker, expected", [
+    (b'import motor\r\n', b'', None),
+    (b'import motor\r\n>>> ', b'', (True, 'import motor')),
+    (b'x # 1\r\n>>> ', b'# 2\r\n', None), # Prompt atrasado de otro comando
+    (b'x # 1\r\n>>> x # 2\r\n', b'# 2\r\n', None),
+    (b'x # 1\r\n>>> x # 2\r\n>>> ', b'# 2\r\n', (True, '')),
+    (b'x # 2\r\nTraceback (most recent call last):\r\n>>> ', b'# 2\r\n',
+     (False, 'x # 2\r\nTraceback (most recent call last):\r\n>>> ')),
+])
+def test_parse_reply(response, marker, expected):
+    assert parse_reply('x', response, marker, verbose=False) == expected
+
+
+@pytest.fixture
+def pty_serial():
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    spike_serial = serial.Serial(os.ttyname(slave), 115200, timeout=0.2)
+    yield master, spike_serial
+    spike_serial.close()
+    os.close(master)
+    os.close(slave)
+
+
+def _answer_after_write(master, reply):
+    """Hub mínimo: espera la línea del comando y contesta con reply."""
+    def answer():
+        line = b''
+        while not line.endswith(b'\n'):
+            line += os.read(master, 100)
+        os.write(master, reply(line))
+    thread = threading.Thread(target=answer, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_send_spike_command_waits_for_tagged_prompt(pty_serial):
+    master, spike_serial = pty_serial
+    # El prompt atrasado de un comando anterior llega antes que el eco de este
+    thread = _answer_after_write(master, lambda line: b'>>> ' + line + b'>>> ')
+    assert send_spike_command(spike_serial, 'motor.stop(port.A)', tag=3, verbose=False) == (True, '')
+    thread.join()
+
+
+def test_send_spike_command_times_out_on_stale_prompt(pty_serial):
+    master, spike_serial = pty_serial
+    thread = _answer_after_write(master, lambda line: b'x # 2\r\n>>> ')
+    success, response = send_spike_command(spike_serial, 'x', timeout=0.1, tag=3, verbose=False)
+    assert not success
+    assert response == 'x # 2\r\n>>> '
+    thread.join()
+
+
+def test_send_spike_command_closed_port():
+    assert send_spike_command(None, 'import motor', verbose=False) == (False, "Serial port closed")
@@ -0,0 +1,128 @@
+import socket
+import time
+
+import pytest
+
+from xbox_udp_remote import (UdpTriggerReceiver, pack_state, unpack_state, seq_newer,
+                             SEQ_MODULO, PACKET_SIZE)
+
+SESSION_A = 0xAAAA0001
+SESSION_B = 0xBBBB0002
+
+
+@pytest.fixture
+def receiver():
+    receiver = UdpTriggerReceiver('127.0.0.1', 0, timeout=0.1)
+    yield receiver
+    receiver.close()
+
+
+@pytest.fixture
+def sender(receiver):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    target = receiver.sock.getsockname()
+
+    def send(session_id, seq, lt=-1.0, rt=-1.0):
+        sock.sendto(pack_state(session_id, seq, lt, rt), target)
+
+    yield send
+    sock.close()
+
+
+def deliver(receiver):
+    """Espera a que los datagramas enviados por localhost estén disponibles y los procesa."""
+    time.sleep(0.02)
+    return receiver.poll()
+
+
+def test_pack_unpack_roundtrip():
+    packet = pack_state(SESSION_A, 7, 0.5, -1.0, sent_time=123.25)
+    assert len(packet) == PACKET_SIZE
+    session_id, seq, sent_time, lt, rt = unpack_state(packet)
+    assert (session_id, seq, sent_time) == (SESSION_A, 7, 123.25)
+    assert lt == pytest.approx(0.5, abs=1e-4)
+    assert rt == -1.0
+
+
+def test_unpack_rejects_invalid():
+    assert unpack_state(b'junk') is None
+    assert unpack_state(b'ZZ' + pack_state(SESSION_A, 1, 0.0, 0.0)[2:]) is None
+
+
+def test_seq_newer_wraparound():
+    assert seq_newer(2, 1)
+    assert not seq_newer(1, 2)
+    assert not seq_newer(5, 5)
+    assert seq_newer(0, SEQ_MODULO - 1)
+    assert seq_newer(3, SEQ_MODULO - 2)
+    assert not seq_newer(SEQ_MODULO - 1, 0)
+
+
+def test_duplicates_are_dropped(receiver, sender):
+    sender(SESSION_A, 1, lt=0.2)
+    sender(SESSION_A, 1, lt=0.2)
+    assert deliver(receiver)
+    assert receiver.accepted == 1
+    assert receiver.duplicates == 1
+    assert receiver.lost == 0
+
+
+def test_reordered_packet_is_not_counted_as_lost(receiver, sender):
+    sender(SESSION_A, 1)
+    sender(SESSION_A, 2)
+    sender(SESSION_A, 4, lt=0.8)
+    sender(SESSION_A, 3, lt=0.1)
+    sender(SESSION_A, 3, lt=0.1)
+    deliver(receiver)
+    assert receiver.triggers[0] == pytest.approx(0.8, abs=1e-4)
+    assert receiver.last_seq == 4
+    assert receiver.lost == 0
+    assert receiver.out_of_order == 1
+    assert receiver.duplicates == 1
+
+
+def test_gap_counts_as_lost(receiver, sender):
+    sender(SESSION_A, 1)
+    sender(SESSION_A, 5)
+    deliver(receiver)
+    assert receiver.lost == 3
+    assert "perdidos=3" in receiver.stats_summary()
+
+
+def test_sequence_wraparound_is_accepted(receiver, sender):
+    sender(SESSION_A, SEQ_MODULO - 1)
+    sender(SESSION_A, 0, lt=0.3)
+    deliver(receiver)
+    assert receiver.accepted == 2
+    assert receiver.last_seq == 0
+    assert receiver.lost == 0
+
+
+def test_other_session_ignored_while_current_is_active(receiver, sender):
+    sender(SESSION_B, 10, lt=0.0)
+    deliver(receiver)
+    sender(SESSION_A, 50, lt=1.0) # Paquete atrasado de un emisor anterior
+    sender(SESSION_B, 11, lt=0.0)
+    deliver(receiver)
+    assert receiver.session_id == SESSION_B
+    assert receiver.triggers[0] == pytest.approx(0.0, abs=1e-4)
+    assert receiver.other_sessions == 1
+
+
+def test_new_session_adopted_after_timeout(receiver, sender):
+    sender(SESSION_A, 100)
+    deliver(receiver)
+    time.sleep(receiver.timeout * 1.5)
+    assert receiver.is_stale()
+    sender(SESSION_B, 1, lt=0.4) # Emisor reiniciado: la secuencia vuelve a empezar
+    sender(SESSION_B, 2, lt=0.5)
+    deliver(receiver)
+    assert receiver.session_id == SESSION_B
+    assert receiver.last_seq == 2
+    assert not receiver.is_stale()
+
+
+def test_second_receiver_on_same_port_fails(receiver):
+    port = receiver.sock.getsockname()[1]
+    with pytest.raises(OSError):
+        UdpTriggerReceiver('127.0.0.1', port)
@@ -0,0 +1,207 @@
+import json
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError: # numpy solo hace falta para muestrear; sin él se usan los umbrales fijos
+    np = None
+
+# --- Calibración del ruido en reposo ---
+# Al arrancar se muestrean todos los ejes con el control quieto. Para cada eje se obtiene
+# el valor de reposo (mediana) y la banda de ruido (desviación máxima respecto al reposo).
+# Los sticks se centran restando el reposo y los gatillos se normalizan desde su reposo real.
+# La zona muerta es el umbral fijo de xbox_config.py, ampliado solo si el ruido medido lo
+# supera: un segundo en reposo no mide cuánto falla el centro al soltar un stick, así que
+# la calibración nunca filtra menos que antes.
+CALIBRATION_DURATION = 1.0 # Segundos de muestreo
+CALIBRATION_RATE_HZ = 500 # Muestras por segundo
+DEADZONE_MARGIN = 2.0 # Zona muerta medida = banda de ruido x margen
+MAX_DEADZONE = 0.35 # Con más ruido que esto se asume que el control se movió: se usan los umbrales fijos
+# Un gatillo suelto reposa cerca de -1.0. Algunos drivers (SDL en Linux) reportan 0.0 hasta la
+# primera pulsación; un reposo por encima de este valor no se usa para normalizar
+TRIGGER_MAX_REST = -0.5
+# La caché se guarda por modelo (el GUID de SDL no distingue dos controles iguales), así que
+# antes de usar una entrada se vuelve a muestrear brevemente y se descarta si algún reposo
+# se salió de su banda de ruido (otro control del mismo modelo o un stick que derivó)
+CACHE_CHECK_DURATION = 0.1 # Segundos de muestreo para verificar la caché
+CALIBRATION_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'xbox_controller_monitor', 'calibration.json')
+
+
+class AxisCalibration:
+    """Reposo, banda de ruido y zona muerta medida de cada eje (listas, en unidades de eje).
+
+    Los ejes no fiables (stable=False) devuelven siempre los valores por defecto del script.
+    """
+
+    def __init__(self, offsets, noise, deadzones, stable):
+        self.offsets = [float(value) for value in offsets]
+        self.noise = [float(value) for value in noise]
+        self.deadzones = [float(value) for value in deadzones]
+        self.stable = [bool(value) for value in stable]
+        if not len(self.offsets) == len(self.noise) == len(self.deadzones) == len(self.stable):
+            raise ValueError("Calibración con distinto número de ejes por campo")
+
+    @classmethod
+    def uncalibrated(cls, num_axes):
+        """Calibración vacía: todos los ejes usan los valores por defecto."""
+        return cls([0.0] * num_axes, [0.0] * num_axes, [0.0] * num_axes, [False] * num_axes)
+
+    def _is_stable(self, index):
+        return index < len(self.stable) and bool(self.stable[index])
+
+    def center(self, index, value):
+        """Valor del stick con el reposo restado."""
+        return value - self.offsets[index] if self._is_stable(index) else value
+
+    def deadzone(self, index, default):
+        """Zona muerta del eje (unidades de eje): default, ampliado si el ruido medido es mayor."""
+        return max(default, self.deadzones[index]) if self._is_stable(index) else default
+
+    def trigger_rest(self, index, default=-1.0):
+        """Valor en crudo del gatillo suelto."""
+        if self._is_stable(index) and self.offsets[index] <= TRIGGER_MAX_REST:
+            return self.offsets[index]
+        return default
+
+    def trigger_deadzone(self, index, default):
+        """Zona muerta del gatillo (normalizada 0.0 a 1.0): default, ampliado si el ruido medido es mayor."""
+        if not self._is_stable(index) or self.offsets[index] > TRIGGER_MAX_REST:
+            return default
+        return max(default, self.deadzones[index] / (1.0 - self.trigger_rest(index)))
+
+    def to_dict(self):
+        return {'offsets': self.offsets, 'noise': self.noise,
+                'deadzones': self.deadzones, 'stable': self.stable}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Lee una entrada de la caché; ValueError/KeyError/TypeError si no es válida."""
+        for key in ('offsets', 'noise', 'deadzones'):
+            if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in data[key]):
+                raise ValueError(f"Calibración con valores no numéricos en '{key}'")
+        if not all(isinstance(value, bool) for value in data['stable']):
+            raise ValueError("Calibración con valores no booleanos en 'stable'")
+        return cls(data['offsets'], data['noise'], data['deadzones'], data['stable'])
+
+
+def sample_axes(joystick, duration=CALIBRATION_DURATION, rate=CALIBRATION_RATE_HZ, pump=None):
+    """Lee todos los ejes a la tasa indicada. Devuelve un array (muestras, ejes)."""
+    num_axes = joystick.get_numaxes()
+    num_samples = max(2, int(duration * rate))
+    samples = np.empty((num_samples, num_axes))
+    period = 1.0 / rate
+    next_time = time.monotonic()
+    for row in range(num_samples):
+        if pump:
+            pump() # Pygame solo actualiza el estado del joystick al procesar eventos
+        samples[row] = [joystick.get_axis(i) for i in range(num_axes)]
+        next_time += period
+        delay = next_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    return samples
+
+
+def calibration_available():
+    """True si numpy está instalado y se puede muestrear."""
+    return np is not None
+
+
+def compute_calibration(samples, margin=DEADZONE_MARGIN, max_deadzone=MAX_DEADZONE):
+    """Calcula reposo, ruido y zona muerta medida de todos los ejes a la vez a partir de las muestras."""
+    samples = np.asarray(samples, dtype=float)
+    offsets = np.median(samples, axis=0)
+    noise = np.abs(samples - offsets).max(axis=0)
+    deadzones = noise * margin
+    stable = deadzones <= max_deadzone
+    return AxisCalibration(offsets, noise, deadzones, stable)
+
+
+def calibration_matches(calibration, samples):
+    """True si el reposo de cada eje estable en las muestras nuevas sigue dentro de su banda de ruido."""
+    offsets = np.median(np.asarray(samples, dtype=float), axis=0)
+    if len(offsets) != len(calibration.offsets):
+        return False
+    drift = np.abs(offsets - np.asarray(calibration.offsets))
+    stable = np.asarray(calibration.stable, dtype=bool)
+    return bool(np.all(drift[stable] <= np.asarray(calibration.noise)[stable]))
+
+
+def device_key(joystick):
+    """Identificador del modelo de control para la caché (GUID de SDL si está disponible).
+
+    Dos controles del mismo modelo comparten clave: calibrate_joystick verifica la entrada.
+    """
+    get_guid = getattr(joystick, 'get_guid', None)
+    guid = get_guid() if get_guid else ''
+    return f"{guid or joystick.get_name()}:{joystick.get_numaxes()}"
+
+
+def load_cached_calibration(joystick, cache_path=CALIBRATION_CACHE_PATH):
+    """Calibración guardada de este control, o None si no hay o la entrada no es válida."""
+    try:
+        with open(cache_path) as f:
+            data = json.load(f).get(device_key(joystick))
+        if not data:
+            return None
+        calibration = AxisCalibration.from_dict(data)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if len(calibration.offsets) != joystick.get_numaxes():
+        return None
+    return calibration
+
+
+def save_cached_calibration(joystick, calibration, cache_path=CALIBRATION_CACHE_PATH):
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if not isinstance(cache, dict):
+        cache = {} # Archivo con JSON válido pero que no es una caché: se reemplaza
+    cache[device_key(joystick)] = calibration.to_dict()
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print(f"Advertencia: No se pudo guardar la calibración en {cache_path}: {e}")
+
+
+def calibrate_joystick(joystick, duration=CALIBRATION_DURATION, rate=CALIBRATION_RATE_HZ, pump=None,
+                       use_cache=False, recalibrate=False, cache_path=CALIBRATION_CACHE_PATH):
+    """Calibra el control (o la carga de la caché). Devuelve (calibración, True si vino de la caché).
+
+    Una entrada de la caché solo se usa si un muestreo corto confirma que el reposo no cambió.
+    Solo se guarda en caché una calibración en la que todos los ejes resultaron estables.
+    """
+    if not calibration_available():
+        print("Advertencia: numpy no está instalado; se usan los umbrales fijos.")
+        return AxisCalibration.uncalibrated(joystick.get_numaxes()), False
+
+    if use_cache and not recalibrate:
+        cached = load_cached_calibration(joystick, cache_path)
+        if cached is not None:
+            if calibration_matches(cached, sample_axes(joystick, CACHE_CHECK_DURATION, rate, pump)):
+                return cached, True
+            print("El reposo del control no coincide con la calibración guardada; se calibra de nuevo.")
+
+    calibration = compute_calibration(sample_axes(joystick, duration, rate, pump))
+    if use_cache and all(calibration.stable):
+        save_cached_calibration(joystick, calibration, cache_path)
+    return calibration, False
+
+
+def print_calibration(calibration, from_cache=False):
+    if not any(calibration.stable) and not any(calibration.noise):
+        return # Sin calibración (p. ej. sin numpy): no hay nada que mostrar
+    origin = "caché" if from_cache else "muestreo"
+    print(f"Calibración ({origin}):")
+    for i, (offset, noise, deadzone, stable) in enumerate(zip(calibration.offsets, calibration.noise,
+                                                                calibration.deadzones, calibration.stable)):
+        status = "" if stable else "  <- inestable, se usa el umbral fijo"
+        print(f"  Eje {i}: reposo={offset:>6.3f}, ruido={noise:>5.3f}, zona muerta medida={deadzone:>5.3f}{status}")
+    if not all(calibration.stable):
+        print("Advertencia: Algunos ejes se movieron durante la calibración. ¿Se tocó el control?")
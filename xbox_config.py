@@ -0,0 +1,39 @@
+# --- Configuración compartida ---
+# Mapeo de ejes, umbrales y parámetros del motor que usan el monitor, el control del motor,
+# el emisor UDP y el arnés de carga. Ajusta aquí; los scripts importan estos valores.
+
+# --- Mapeo de ejes (Pygame) ---
+# Comprueba estos índices con tu control. Mapeo común en Linux:
+AXIS_LEFT_STICK_X = 0
+AXIS_LEFT_STICK_Y = 1
+# --- Potential Swap ---
+# Original: AXIS_RIGHT_STICK_X = 3, AXIS_RIGHT_STICK_Y = 4
+# Original: AXIS_LEFT_TRIGGER = 2, AXIS_RIGHT_TRIGGER = 5
+AXIS_RIGHT_STICK_X = 2 # A menudo 2 o 3
+AXIS_RIGHT_STICK_Y = 3 # A menudo 3 o 4
+# Gatillos: de -1.0 (suelto) a 1.0 (presionado a fondo)
+AXIS_LEFT_TRIGGER = 5  # A menudo 5 o 2
+AXIS_RIGHT_TRIGGER = 4 # A menudo 4 o 5
+# --- End Potential Swap ---
+
+# --- Umbrales ---
+# Son el mínimo: la calibración al arrancar solo puede ampliarlos si el control tiene más ruido
+STICK_THRESHOLD = 0.2 # Umbral para considerar movimiento en sticks
+MONITOR_TRIGGER_THRESHOLD = 0.1 # Umbral de gatillos del monitor (normalizado 0.0 a 1.0)
+MOTOR_TRIGGER_THRESHOLD = 0.05 # Umbral mínimo para considerar un gatillo presionado en el control del motor
+
+# --- Spike Hub / Motor ---
+SPIKE_BAUD_RATE = 115200
+MOTOR_PORT_LETTER = 'A' # Puerto del motor en el Spike Hub
+SERIAL_TIMEOUT = 0.5 # Segundos de espera para respuesta del Hub
+# Velocidades máximas típicas (grados/segundo): Medium=1110, Large=1050, Small=660
+MAX_MOTOR_SPEED = 1000 # Ajusta según tu motor y preferencia
+MOTOR_STOP_THRESHOLD_PERCENT = 2 # Porcentaje de MAX_MOTOR_SPEED por debajo del cual se considera 0
+MOTOR_COMMAND_INTERVAL = 0.05 # Segundos - Intervalo mínimo entre comandos de velocidad al Spike
+LOOP_DELAY = 0.02 # Segundos - Pausa del bucle principal (el arnés de carga usa la misma)
+DEBOUNCE_THRESHOLD_PERCENT = 1 # Porcentaje de cambio mínimo para enviar nuevo comando
+
+# --- Constantes Internas ---
+MOTOR_STOP_THRESHOLD_SPEED = int(MAX_MOTOR_SPEED * (MOTOR_STOP_THRESHOLD_PERCENT / 100.0))
+DEBOUNCE_THRESHOLD_SPEED = int(MAX_MOTOR_SPEED * (DEBOUNCE_THRESHOLD_PERCENT / 100.0))
+REPL_PROMPT = b'>>> ' # Prompt de MicroPython que esperamos
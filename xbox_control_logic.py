@@ -0,0 +1,68 @@
+# --- Lógica compartida del monitor y del control del motor ---
+# Funciones puras (sin Pygame ni serial) para que los scripts y el arnés de carga
+# (xbox_load_harness.py) ejecuten exactamente las mismas decisiones.
+
+
+def normalize_trigger(value, rest=-1.0):
+    """Convierte valor de eje de gatillo Pygame (rest a 1) a 0.0 a 1.0"""
+    return min(1.0, max(0.0, (value - rest) / (1.0 - rest)))
+
+
+def _per_axis(threshold):
+    """Acepta un umbral común o uno por eje (tupla de dos)."""
+    return threshold if isinstance(threshold, tuple) else (threshold, threshold)
+
+
+def axis_pair_event(last_values, current_values, was_active, threshold):
+    """Aplica el umbral a un par de ejes (stick X/Y o gatillos LT/RT) como lo hace el monitor.
+
+    threshold puede ser un valor común o una tupla con la zona muerta de cada eje.
+    Devuelve (valores a mostrar o None, nuevo was_active, nuevo last_values).
+    Al volver al reposo se devuelve (0.0, 0.0) una sola vez.
+    """
+    if last_values == current_values:
+        return None, was_active, last_values
+    threshold_0, threshold_1 = _per_axis(threshold)
+    if abs(current_values[0]) > threshold_0 or abs(current_values[1]) > threshold_1:
+        return current_values, True, current_values
+    if was_active:
+        return (0.0, 0.0), False, current_values
+    return None, False, current_values
+
+
+def trigger_velocity(left_trigger_raw, right_trigger_raw, threshold, max_speed, rests=(-1.0, -1.0)):
+    """Calcula la velocidad objetivo del motor (grados/s) a partir de los gatillos en crudo.
+
+    threshold puede ser común o (LT, RT); rests son los valores en crudo de cada gatillo suelto.
+    """
+    left_trigger_norm = normalize_trigger(left_trigger_raw, rests[0])
+    right_trigger_norm = normalize_trigger(right_trigger_raw, rests[1])
+    lt_threshold, rt_threshold = _per_axis(threshold)
+
+    # Aplicar umbral
+    lt_val = left_trigger_norm if left_trigger_norm > lt_threshold else 0.0
+    rt_val = right_trigger_norm if right_trigger_norm > rt_threshold else 0.0
+
+    return int((rt_val - lt_val) * max_speed)
+
+
+def next_motor_command(target_velocity, last_sent_velocity, time_since_last_command,
+                       port_letter, command_interval, debounce_speed, stop_speed):
+    """Decide si hay que enviar un comando al motor.
+
+    Devuelve (comando, velocidad_enviada) o (None, None) si no hace falta enviar nada.
+    Solo se envía si ha pasado command_interval y la velocidad cambió más de
+    debounce_speed, o si hay que parar un motor que no estaba en 0.
+    """
+    if time_since_last_command < command_interval:
+        return None, None
+
+    if abs(target_velocity) <= stop_speed:
+        # Enviar comando STOP solo si no estábamos ya en velocidad 0
+        if last_sent_velocity != 0:
+            return f'motor.stop(port.{port_letter})', 0
+        return None, None
+
+    if abs(target_velocity - last_sent_velocity) > debounce_speed:
+        return f'motor.run(port.{port_letter}, {target_velocity})', target_velocity
+    return None, None
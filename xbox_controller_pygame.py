@@ -1,6 +1,12 @@
 import pygame
 import time
 import os
+import sys
+
+from xbox_config import (AXIS_LEFT_STICK_X, AXIS_LEFT_STICK_Y, AXIS_RIGHT_STICK_X, AXIS_RIGHT_STICK_Y,
+                         AXIS_LEFT_TRIGGER, AXIS_RIGHT_TRIGGER, STICK_THRESHOLD, MONITOR_TRIGGER_THRESHOLD)
+from xbox_control_logic import normalize_trigger, axis_pair_event
+from xbox_calibration import AxisCalibration, calibrate_joystick, print_calibration, CALIBRATION_DURATION
 
 # --- Pygame Configuration ---
 # Force SDL to use the dummy video driver if no display is available
@@ -56,27 +62,33 @@ button_map = {
     15: "Botón Compartir", # New mapping for index 15
 }
 
-# Map Pygame axis indices - Check these with your specific controller
-# Common Linux mapping:
-AXIS_LEFT_STICK_X = 0
-AXIS_LEFT_STICK_Y = 1
-# --- Potential Swap ---
-# Original: AXIS_RIGHT_STICK_X = 3, AXIS_RIGHT_STICK_Y = 4
-# Original: AXIS_LEFT_TRIGGER = 2, AXIS_RIGHT_TRIGGER = 5
-# Swapped values:
-AXIS_RIGHT_STICK_X = 2 # Often 2 or 3
-AXIS_RIGHT_STICK_Y = 3 # Often 3 or 4
-# Triggers might be axes 2 and 5. Value ranges from -1.0 (released) to 1.0 (fully pressed).
-AXIS_LEFT_TRIGGER = 5  # Often 5 or 2
-AXIS_RIGHT_TRIGGER = 4 # Often 4 or 5
-# --- End Potential Swap ---
+# Axis indices and stick/trigger thresholds are shared with the motor scripts: see xbox_config.py
 
 # Map Pygame hat indices (usually only one hat, index 0 for D-Pad)
 HAT_DPAD = 0
 
-# --- Thresholds ---
-STICK_THRESHOLD = 0.2  # Threshold for considering stick movement
-TRIGGER_THRESHOLD = 0.1 # Threshold for triggers (after normalization)
+# --- Calibration ---
+CALIBRATION_ENABLED = True # Sample the resting controller at startup to derive per-axis rest values and deadzones
+CALIBRATION_USE_CACHE = False # Reuse the stored calibration for this controller (--recalibrate forces a new one)
+
+# --- Startup Calibration ---
+if CALIBRATION_ENABLED:
+    print(f"Calibrando ejes durante {CALIBRATION_DURATION}s, no toques el control...")
+    calibration, from_cache = calibrate_joystick(joystick, pump=pygame.event.pump,
+                                                 use_cache=CALIBRATION_USE_CACHE,
+                                                 recalibrate='--recalibrate' in sys.argv)
+    print_calibration(calibration, from_cache)
+else:
+    calibration = AxisCalibration.uncalibrated(joystick.get_numaxes())
+
+# Per-axis deadzones (stick units) and trigger rest values / deadzones (normalized units)
+left_stick_deadzones = (calibration.deadzone(AXIS_LEFT_STICK_X, STICK_THRESHOLD),
+                        calibration.deadzone(AXIS_LEFT_STICK_Y, STICK_THRESHOLD))
+right_stick_deadzones = (calibration.deadzone(AXIS_RIGHT_STICK_X, STICK_THRESHOLD),
+                         calibration.deadzone(AXIS_RIGHT_STICK_Y, STICK_THRESHOLD))
+trigger_rests = (calibration.trigger_rest(AXIS_LEFT_TRIGGER), calibration.trigger_rest(AXIS_RIGHT_TRIGGER))
+trigger_deadzones = (calibration.trigger_deadzone(AXIS_LEFT_TRIGGER, MONITOR_TRIGGER_THRESHOLD),
+                     calibration.trigger_deadzone(AXIS_RIGHT_TRIGGER, MONITOR_TRIGGER_THRESHOLD))
 
 # --- State Variables ---
 last_buttons_pressed = set()
@@ -87,23 +99,18 @@ last_right_stick = (0.0, 0.0)
 was_left_stick_active = False
 was_right_stick_active = False
 
-# --- Helper Function ---
-def normalize_trigger(value):
-    """Converts pygame trigger axis value (-1 to 1) to 0.0 to 1.0"""
-    return (value + 1.0) / 2.0
-
 # --- Read Initial State Before Loop ---
 # Read initial trigger state to avoid printing the resting state at start
 initial_left_trigger_val = 0.0
 initial_right_trigger_val = 0.0
 if joystick.get_numaxes() > AXIS_LEFT_TRIGGER:
-    initial_left_trigger_val = normalize_trigger(joystick.get_axis(AXIS_LEFT_TRIGGER))
+    initial_left_trigger_val = normalize_trigger(joystick.get_axis(AXIS_LEFT_TRIGGER), trigger_rests[0])
 if joystick.get_numaxes() > AXIS_RIGHT_TRIGGER:
-    initial_right_trigger_val = normalize_trigger(joystick.get_axis(AXIS_RIGHT_TRIGGER))
+    initial_right_trigger_val = normalize_trigger(joystick.get_axis(AXIS_RIGHT_TRIGGER), trigger_rests[1])
 last_triggers = (initial_left_trigger_val, initial_right_trigger_val) # Initialize with actual starting values
 
 # Initialize was_triggers_active based on the *actual* initial state
-was_triggers_active = last_triggers[0] > TRIGGER_THRESHOLD or last_triggers[1] > TRIGGER_THRESHOLD
+was_triggers_active = last_triggers[0] > trigger_deadzones[0] or last_triggers[1] > trigger_deadzones[1]
 
 # --- Main Loop ---
 try:
@@ -142,12 +149,12 @@ try:
         # Ensure axis indices are valid before reading
         current_left_stick = (0.0, 0.0)
         if joystick.get_numaxes() > AXIS_LEFT_STICK_X:
-            current_left_stick_x = joystick.get_axis(AXIS_LEFT_STICK_X)
+            current_left_stick_x = calibration.center(AXIS_LEFT_STICK_X, joystick.get_axis(AXIS_LEFT_STICK_X))
         else:
             current_left_stick_x = 0.0
         if joystick.get_numaxes() > AXIS_LEFT_STICK_Y:
             # Invert Y axis value
-            current_left_stick_y = joystick.get_axis(AXIS_LEFT_STICK_Y) * -1.0
+            current_left_stick_y = calibration.center(AXIS_LEFT_STICK_Y, joystick.get_axis(AXIS_LEFT_STICK_Y)) * -1.0
         else:
             current_left_stick_y = 0.0
         current_left_stick = (current_left_stick_x, current_left_stick_y)
@@ -155,12 +162,12 @@ try:
 
         current_right_stick = (0.0, 0.0)
         if joystick.get_numaxes() > AXIS_RIGHT_STICK_X:
-            current_right_stick_x = joystick.get_axis(AXIS_RIGHT_STICK_X)
+            current_right_stick_x = calibration.center(AXIS_RIGHT_STICK_X, joystick.get_axis(AXIS_RIGHT_STICK_X))
         else:
             current_right_stick_x = 0.0
         if joystick.get_numaxes() > AXIS_RIGHT_STICK_Y:
             # Invert Y axis value
-            current_right_stick_y = joystick.get_axis(AXIS_RIGHT_STICK_Y) * -1.0
+            current_right_stick_y = calibration.center(AXIS_RIGHT_STICK_Y, joystick.get_axis(AXIS_RIGHT_STICK_Y)) * -1.0
         else:
             current_right_stick_y = 0.0
         current_right_stick = (current_right_stick_x, current_right_stick_y)
@@ -170,10 +177,10 @@ try:
         left_trigger_val = 0.0
         right_trigger_val = 0.0
         if joystick.get_numaxes() > AXIS_LEFT_TRIGGER:
-            # Pygame triggers often rest at -1.0, normalize to 0.0 -> 1.0
-            left_trigger_val = normalize_trigger(joystick.get_axis(AXIS_LEFT_TRIGGER))
+            # Pygame triggers often rest at -1.0 (calibrated rest value if available), normalize to 0.0 -> 1.0
+            left_trigger_val = normalize_trigger(joystick.get_axis(AXIS_LEFT_TRIGGER), trigger_rests[0])
         if joystick.get_numaxes() > AXIS_RIGHT_TRIGGER:
-            right_trigger_val = normalize_trigger(joystick.get_axis(AXIS_RIGHT_TRIGGER))
+            right_trigger_val = normalize_trigger(joystick.get_axis(AXIS_RIGHT_TRIGGER), trigger_rests[1])
         current_triggers = (left_trigger_val, right_trigger_val)
 
 
@@ -197,47 +204,23 @@ try:
             last_dpad_state = current_dpad_state
 
         # Left Stick
-        left_stick_changed = last_left_stick != current_left_stick
-        left_stick_active = abs(current_left_stick[0]) > STICK_THRESHOLD or abs(current_left_stick[1]) > STICK_THRESHOLD
-
-        if left_stick_changed:
-            if left_stick_active:
-                print(f"Stick Izq: X={current_left_stick[0]:>6.3f}, Y={current_left_stick[1]:>6.3f}")
-                was_left_stick_active = True
-            elif was_left_stick_active:
-                # Print explicit zero state when returning to inactive
-                print(f"Stick Izq: X={0.0:>6.3f}, Y={0.0:>6.3f}")
-                was_left_stick_active = False
-            last_left_stick = current_left_stick
-
+        # Prints the current values while active, and an explicit zero once when returning to inactive
+        left_stick_event, was_left_stick_active, last_left_stick = axis_pair_event(
+            last_left_stick, current_left_stick, was_left_stick_active, left_stick_deadzones)
+        if left_stick_event:
+            print(f"Stick Izq: X={left_stick_event[0]:>6.3f}, Y={left_stick_event[1]:>6.3f}")
 
         # Right Stick
-        right_stick_changed = last_right_stick != current_right_stick
-        right_stick_active = abs(current_right_stick[0]) > STICK_THRESHOLD or abs(current_right_stick[1]) > STICK_THRESHOLD
-
-        if right_stick_changed:
-            if right_stick_active:
-                print(f"Stick Der: X={current_right_stick[0]:>6.3f}, Y={current_right_stick[1]:>6.3f}")
-                was_right_stick_active = True
-            elif was_right_stick_active:
-                 # Print explicit zero state when returning to inactive
-                print(f"Stick Der: X={0.0:>6.3f}, Y={0.0:>6.3f}")
-                was_right_stick_active = False
-            last_right_stick = current_right_stick
+        right_stick_event, was_right_stick_active, last_right_stick = axis_pair_event(
+            last_right_stick, current_right_stick, was_right_stick_active, right_stick_deadzones)
+        if right_stick_event:
+            print(f"Stick Der: X={right_stick_event[0]:>6.3f}, Y={right_stick_event[1]:>6.3f}")
 
         # Triggers
-        triggers_changed = last_triggers != current_triggers
-        triggers_active = current_triggers[0] > TRIGGER_THRESHOLD or current_triggers[1] > TRIGGER_THRESHOLD
-
-        if triggers_changed:
-            if triggers_active:
-                 print(f"Gatillos: LT={current_triggers[0]:>5.3f}, RT={current_triggers[1]:>5.3f}")
-                 was_triggers_active = True
-            elif was_triggers_active:
-                 # Print explicit zero state when returning to inactive
-                 print(f"Gatillos: LT={0.0:>5.3f}, RT={0.0:>5.3f}")
-                 was_triggers_active = False
-            last_triggers = current_triggers
+        triggers_event, was_triggers_active, last_triggers = axis_pair_event(
+            last_triggers, current_triggers, was_triggers_active, trigger_deadzones)
+        if triggers_event:
+            print(f"Gatillos: LT={triggers_event[0]:>5.3f}, RT={triggers_event[1]:>5.3f}")
 
 
         # Small delay to prevent high CPU usage
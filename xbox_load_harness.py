@@ -0,0 +1,488 @@
+import argparse
+import asyncio
+import heapq
+import json
+import math
+import multiprocessing
+import os
+import random
+import select
+import threading
+import time
+import tty
+from concurrent.futures import ProcessPoolExecutor
+
+import serial
+
+from xbox_config import (AXIS_LEFT_STICK_X, AXIS_LEFT_STICK_Y, AXIS_RIGHT_STICK_X, AXIS_RIGHT_STICK_Y,
+                         AXIS_LEFT_TRIGGER, AXIS_RIGHT_TRIGGER, STICK_THRESHOLD, MONITOR_TRIGGER_THRESHOLD,
+                         MOTOR_TRIGGER_THRESHOLD, SPIKE_BAUD_RATE, MOTOR_PORT_LETTER, SERIAL_TIMEOUT,
+                         MAX_MOTOR_SPEED, MOTOR_COMMAND_INTERVAL, MOTOR_STOP_THRESHOLD_SPEED,
+                         DEBOUNCE_THRESHOLD_SPEED, REPL_PROMPT, LOOP_DELAY)
+from xbox_control_logic import normalize_trigger, axis_pair_event, trigger_velocity, next_motor_command
+from xbox_spike_serial import send_spike_command, write_command, read_available, parse_reply, POLL_DELAY
+from xbox_calibration import (AxisCalibration, calibration_available, compute_calibration,
+                              CALIBRATION_DURATION, CALIBRATION_RATE_HZ)
+
+# --- Arnés de carga sintético ---
+# Ejecuta N controles virtuales contra la lógica del monitor (xbox_controller_pygame.py) y,
+# los primeros M, también contra la lógica del motor (xbox_spike_motor_control.py), cada uno
+# con su propio Spike Hub emulado sobre un pty. Sirve para medir hasta dónde escala un
+# equipo y comparar una distribución en hilos, procesos o asyncio.
+#
+# Los comandos al hub usan la misma función serial que el script (xbox_spike_serial.py) y el
+# bucle hace la misma pausa fija (LOOP_DELAY), así las cifras describen al script real.
+# Los controles sintéticos se calibran antes de lanzar los flujos, como los scripts al
+# arrancar, y todos los flujos empiezan a medir a la vez.
+# Los hubs emulados corren en un proceso aparte para no competir por el GIL con los flujos
+# medidos, igual en las tres distribuciones.
+#
+# Ejemplo: python3 xbox_load_harness.py --controllers 16 --hubs 4 --layout thread
+
+LAYOUTS = ('thread', 'process', 'asyncio')
+
+
+class SyntheticController:
+    """Imita pygame.joystick.Joystick con ejes generados (ondas lentas + ruido).
+
+    Los sticks tienen una deriva fija en reposo. Con resting=True el control está quieto
+    (para calibrar); si no, los gatillos alternan pulsaciones LT/RT para que el motor cambie
+    de velocidad y sentido.
+    """
+
+    NUM_AXES = 6
+
+    def __init__(self, seed, noise=0.02):
+        self.rng = random.Random(seed)
+        self.noise = noise
+        self.freq = self.rng.uniform(0.2, 1.0) # Hz
+        self.phases = [self.rng.uniform(0.0, 2 * math.pi) for _ in range(self.NUM_AXES)]
+        self.trigger_phase = self.rng.uniform(0.0, 2 * math.pi)
+        self.rest_offsets = [self.rng.uniform(-0.05, 0.05) for _ in range(self.NUM_AXES)]
+        self.resting = False
+        self.t0 = time.monotonic()
+
+    def get_numaxes(self):
+        return self.NUM_AXES
+
+    def get_axis(self, index):
+        t = time.monotonic() - self.t0
+        angle = 2 * math.pi * self.freq * t
+        if index in (AXIS_LEFT_TRIGGER, AXIS_RIGHT_TRIGGER):
+            # Reposo en -1.0; RT presionado durante medio ciclo, LT durante el otro medio
+            if self.resting:
+                return -1.0 + abs(self.rng.gauss(0.0, self.noise))
+            offset = 0.0 if index == AXIS_RIGHT_TRIGGER else math.pi
+            press = max(0.0, math.sin(angle + self.trigger_phase + offset))
+            return -1.0 + 2.0 * press
+        value = self.rest_offsets[index] + self.rng.gauss(0.0, self.noise)
+        if not self.resting:
+            value += 0.6 * math.sin(angle + self.phases[index])
+        return max(-1.0, min(1.0, value))
+
+
+def _run_fake_hubs(count, response_delay, conn, stop_event):
+    """Proceso de los hubs emulados: crea los ptys, envía sus rutas y atiende hasta stop_event."""
+    masters = []
+    slaves = []
+    for _ in range(count):
+        master, slave = os.openpty()
+        tty.setraw(slave) # Sin traducción de fin de línea, como un puerto USB serie
+        masters.append(master)
+        slaves.append(slave) # Se mantiene abierto para que el pty no se cierre entre clientes
+    conn.send([os.ttyname(slave) for slave in slaves])
+
+    buffers = {fd: b'' for fd in masters}
+    hub_index = {fd: i for i, fd in enumerate(masters)}
+    commands_received = [0] * count
+    pending = [] # heap de (hora_de_respuesta, orden, fd, respuesta)
+    order = 0
+    while not stop_event.is_set():
+        timeout = 0.05
+        if pending:
+            timeout = max(0.0, min(timeout, pending[0][0] - time.monotonic()))
+        readable, _, _ = select.select(masters, [], [], timeout)
+        for fd in readable:
+            try:
+                buffers[fd] += os.read(fd, 4096)
+            except OSError:
+                continue
+            while b'\n' in buffers[fd]:
+                line, buffers[fd] = buffers[fd].split(b'\n', 1)
+                commands_received[hub_index[fd]] += 1
+                # Como el REPL real: eco de la línea recibida y luego el prompt
+                reply = line.rstrip(b'\r') + b'\r\n' + REPL_PROMPT
+                heapq.heappush(pending, (time.monotonic() + response_delay, order, fd, reply))
+                order += 1
+        now = time.monotonic()
+        while pending and pending[0][0] <= now:
+            _, _, fd, reply = heapq.heappop(pending)
+            try:
+                os.write(fd, reply)
+            except OSError:
+                pass
+
+    conn.send((commands_received, time.process_time()))
+    for fd in masters + slaves:
+        os.close(fd)
+
+
+class FakeHubServer:
+    """Emula M Spike Hubs sobre ptys en un proceso propio: responde a cada línea con su eco y el prompt."""
+
+    def __init__(self, count, response_delay=0.0):
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._stop_event = multiprocessing.Event()
+        self._process = multiprocessing.Process(target=_run_fake_hubs, daemon=True,
+                                                args=(count, response_delay, child_conn, self._stop_event))
+        self.paths = []
+        self.commands_received = [0] * count
+        self.cpu_time = 0.0
+
+    def start(self):
+        self._process.start()
+        self.paths = self._conn.recv()
+
+    def stop(self):
+        self._stop_event.set()
+        self.commands_received, self.cpu_time = self._conn.recv()
+        self._process.join()
+
+
+class StreamState:
+    """Un flujo de entrada: control sintético, estado del monitor y estado del motor."""
+
+    def __init__(self, index, seed, hub_path):
+        self.index = index
+        self.hub_path = hub_path
+        self.controller = SyntheticController(seed)
+        self.calibrate()
+
+        # Estado del monitor
+        self.last_left_stick = (0.0, 0.0)
+        self.last_right_stick = (0.0, 0.0)
+        self.last_triggers = (0.0, 0.0)
+        self.was_left_stick_active = False
+        self.was_right_stick_active = False
+        self.was_triggers_active = False
+
+        # Estado del motor
+        self.last_sent_velocity = 0
+        self.last_command_time = 0
+        self.command_tag = 0 # Numera cada comando para reconocer su propia respuesta
+
+        # Métricas
+        self.loops = 0
+        self.loop_periods = []
+        self.command_rtts = []
+        self.commands = 0
+        self.command_errors = 0
+        self.monitor_events = 0
+        self.cpu_time = 0.0
+
+    def calibrate(self):
+        """Calibra el control sintético en reposo y deriva zonas muertas como los scripts."""
+        joystick = self.controller
+        if calibration_available():
+            joystick.resting = True
+            num_samples = int(CALIBRATION_DURATION * CALIBRATION_RATE_HZ)
+            # Sin esperas entre muestras: el control sintético no depende del tiempo en reposo
+            samples = [[joystick.get_axis(i) for i in range(joystick.get_numaxes())] for _ in range(num_samples)]
+            joystick.resting = False
+            calibration = compute_calibration(samples)
+        else:
+            calibration = AxisCalibration.uncalibrated(joystick.get_numaxes())
+        self.calibration = calibration
+
+        self.left_stick_deadzones = (calibration.deadzone(AXIS_LEFT_STICK_X, STICK_THRESHOLD),
+                                     calibration.deadzone(AXIS_LEFT_STICK_Y, STICK_THRESHOLD))
+        self.right_stick_deadzones = (calibration.deadzone(AXIS_RIGHT_STICK_X, STICK_THRESHOLD),
+                                      calibration.deadzone(AXIS_RIGHT_STICK_Y, STICK_THRESHOLD))
+        self.trigger_rests = (calibration.trigger_rest(AXIS_LEFT_TRIGGER), calibration.trigger_rest(AXIS_RIGHT_TRIGGER))
+        self.monitor_trigger_deadzones = (calibration.trigger_deadzone(AXIS_LEFT_TRIGGER, MONITOR_TRIGGER_THRESHOLD),
+                                          calibration.trigger_deadzone(AXIS_RIGHT_TRIGGER, MONITOR_TRIGGER_THRESHOLD))
+        self.motor_trigger_deadzones = (calibration.trigger_deadzone(AXIS_LEFT_TRIGGER, MOTOR_TRIGGER_THRESHOLD),
+                                        calibration.trigger_deadzone(AXIS_RIGHT_TRIGGER, MOTOR_TRIGGER_THRESHOLD))
+
+    def monitor_step(self):
+        """Lee sticks y gatillos como el monitor y cuenta los eventos que imprimiría."""
+        joystick = self.controller
+        calibration = self.calibration
+        current_left_stick = (calibration.center(AXIS_LEFT_STICK_X, joystick.get_axis(AXIS_LEFT_STICK_X)),
+                              calibration.center(AXIS_LEFT_STICK_Y, joystick.get_axis(AXIS_LEFT_STICK_Y)) * -1.0)
+        current_right_stick = (calibration.center(AXIS_RIGHT_STICK_X, joystick.get_axis(AXIS_RIGHT_STICK_X)),
+                               calibration.center(AXIS_RIGHT_STICK_Y, joystick.get_axis(AXIS_RIGHT_STICK_Y)) * -1.0)
+        current_triggers = (normalize_trigger(joystick.get_axis(AXIS_LEFT_TRIGGER), self.trigger_rests[0]),
+                            normalize_trigger(joystick.get_axis(AXIS_RIGHT_TRIGGER), self.trigger_rests[1]))
+
+        event, self.was_left_stick_active, self.last_left_stick = axis_pair_event(
+            self.last_left_stick, current_left_stick, self.was_left_stick_active, self.left_stick_deadzones)
+        self.monitor_events += event is not None
+        event, self.was_right_stick_active, self.last_right_stick = axis_pair_event(
+            self.last_right_stick, current_right_stick, self.was_right_stick_active, self.right_stick_deadzones)
+        self.monitor_events += event is not None
+        event, self.was_triggers_active, self.last_triggers = axis_pair_event(
+            self.last_triggers, current_triggers, self.was_triggers_active, self.monitor_trigger_deadzones)
+        self.monitor_events += event is not None
+
+    def motor_step(self, current_time):
+        """Devuelve (comando, velocidad) como el bucle del motor, o (None, None)."""
+        target_velocity = trigger_velocity(self.controller.get_axis(AXIS_LEFT_TRIGGER),
+                                           self.controller.get_axis(AXIS_RIGHT_TRIGGER),
+                                           self.motor_trigger_deadzones, MAX_MOTOR_SPEED, self.trigger_rests)
+        return next_motor_command(target_velocity, self.last_sent_velocity,
+                                  current_time - self.last_command_time, MOTOR_PORT_LETTER,
+                                  MOTOR_COMMAND_INTERVAL, DEBOUNCE_THRESHOLD_SPEED,
+                                  MOTOR_STOP_THRESHOLD_SPEED)
+
+    def command_done(self, success, velocity, current_time, rtt):
+        if success:
+            self.commands += 1
+            self.command_rtts.append(rtt)
+            self.last_sent_velocity = velocity
+            self.last_command_time = current_time
+        else:
+            self.command_errors += 1
+
+    def result(self, layout, elapsed, loop_delay):
+        periods = sorted(self.loop_periods)
+        rtts = sorted(self.command_rtts)
+        mean_period = sum(periods) / len(periods) if periods else 0.0
+        jitter = math.sqrt(sum((p - mean_period) ** 2 for p in periods) / len(periods)) if periods else 0.0
+        # Con la pausa fija del script el periodo normal es loop_delay + trabajo; un periodo de
+        # al menos dos pausas equivale a muestreos que el bucle no alcanzó a hacer
+        dropped = sum(int(p // loop_delay) - 1 for p in periods if p >= 2 * loop_delay)
+        return {
+            'stream': self.index,
+            'layout': layout,
+            'hub': self.hub_path,
+            'loops': self.loops,
+            'period_mean_ms': 1000.0 * mean_period,
+            'period_p99_ms': 1000.0 * _percentile(periods, 0.99),
+            'period_max_ms': 1000.0 * (periods[-1] if periods else 0.0),
+            'jitter_ms': 1000.0 * jitter,
+            'commands': self.commands,
+            'command_errors': self.command_errors,
+            'command_rate': self.commands / elapsed if elapsed else 0.0,
+            'rtt_mean_ms': 1000.0 * (sum(rtts) / len(rtts) if rtts else 0.0),
+            'rtt_max_ms': 1000.0 * (rtts[-1] if rtts else 0.0),
+            'dropped': dropped,
+            'monitor_events': self.monitor_events,
+            'cpu_s': self.cpu_time,
+            'cpu_percent': 100.0 * self.cpu_time / elapsed if elapsed else 0.0,
+        }
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_stream(state, loop_delay, duration, layout, start_barrier=None):
+    """Bucle bloqueante de un flujo (distribuciones 'thread' y 'process'), como el del motor."""
+    try:
+        spike_serial = serial.Serial(state.hub_path, SPIKE_BAUD_RATE, timeout=SERIAL_TIMEOUT) if state.hub_path else None
+    except serial.SerialException:
+        if start_barrier is not None:
+            start_barrier.abort() # Que los demás flujos no se queden esperando
+        raise
+    try:
+        if start_barrier is not None:
+            start_barrier.wait() # Todos los flujos empiezan a medir a la vez
+        start = time.monotonic()
+        end = start + duration
+        last_loop = None
+        while True:
+            now = time.monotonic()
+            if now >= end:
+                break
+            if last_loop is not None:
+                state.loop_periods.append(now - last_loop)
+            last_loop = now
+            state.loops += 1
+
+            cpu0 = time.thread_time()
+            state.monitor_step()
+            if spike_serial:
+                current_time = time.time()
+                command, velocity = state.motor_step(current_time)
+                if command:
+                    state.command_tag += 1
+                    sent_at = time.monotonic()
+                    success, _ = send_spike_command(spike_serial, command, tag=state.command_tag, verbose=False)
+                    state.command_done(success, velocity, current_time, time.monotonic() - sent_at)
+            state.cpu_time += time.thread_time() - cpu0
+
+            time.sleep(loop_delay) # Pausa fija, como el bucle del script
+    finally:
+        if spike_serial:
+            spike_serial.close()
+    return state.result(layout, time.monotonic() - start, loop_delay)
+
+
+async def send_spike_command_async(spike_serial, command, tag, timeout=SERIAL_TIMEOUT):
+    """send_spike_command con las pausas en asyncio.sleep, para la distribución 'asyncio'.
+
+    Mismas llamadas a pyserial y mismo análisis de la respuesta (xbox_spike_serial.py).
+    Devuelve (éxito, tiempo de CPU usado fuera de las esperas).
+    """
+    cpu = 0.0
+    cpu0 = time.thread_time()
+    try:
+        marker = write_command(spike_serial, command, tag)
+        response = b""
+        start_time = time.time()
+        while time.time() - start_time < timeout:
+            chunk = read_available(spike_serial)
+            if chunk:
+                response += chunk
+                reply = parse_reply(command, response, marker, verbose=False)
+                if reply is not None:
+                    return reply[0], cpu + time.thread_time() - cpu0
+            cpu += time.thread_time() - cpu0
+            await asyncio.sleep(POLL_DELAY)
+            cpu0 = time.thread_time()
+        return False, cpu + time.thread_time() - cpu0
+    except serial.SerialException:
+        return False, cpu + time.thread_time() - cpu0
+
+
+async def run_stream_async(state, loop_delay, duration, layout):
+    """Bucle de un flujo como corrutina; todos los flujos comparten un hilo."""
+    spike_serial = serial.Serial(state.hub_path, SPIKE_BAUD_RATE, timeout=SERIAL_TIMEOUT) if state.hub_path else None
+    start = time.monotonic()
+    end = start + duration
+    last_loop = None
+    try:
+        while True:
+            now = time.monotonic()
+            if now >= end:
+                break
+            if last_loop is not None:
+                state.loop_periods.append(now - last_loop)
+            last_loop = now
+            state.loops += 1
+
+            cpu0 = time.thread_time()
+            state.monitor_step()
+            command = None
+            if spike_serial:
+                current_time = time.time()
+                command, velocity = state.motor_step(current_time)
+            state.cpu_time += time.thread_time() - cpu0
+            if command:
+                state.command_tag += 1
+                sent_at = time.monotonic()
+                success, cpu = await send_spike_command_async(spike_serial, command, state.command_tag)
+                state.cpu_time += cpu
+                state.command_done(success, velocity, current_time, time.monotonic() - sent_at)
+
+            await asyncio.sleep(loop_delay)
+    finally:
+        if spike_serial:
+            spike_serial.close()
+    return state.result(layout, time.monotonic() - start, loop_delay)
+
+
+async def _gather_streams(states, loop_delay, duration, layout):
+    # Los puertos se abren antes del primer await, así todos los flujos empiezan a medir juntos
+    return await asyncio.gather(*(run_stream_async(state, loop_delay, duration, layout) for state in states))
+
+
+def run_layout(layout, states, loop_delay, duration):
+    """Ejecuta todos los flujos (ya calibrados) con la distribución elegida y devuelve sus resultados."""
+    if layout == 'asyncio':
+        return asyncio.run(_gather_streams(states, loop_delay, duration, layout))
+    if layout == 'process':
+        with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=len(states)) as executor:
+            start_barrier = manager.Barrier(len(states))
+            futures = [executor.submit(run_stream, state, loop_delay, duration, layout, start_barrier)
+                       for state in states]
+            return [future.result() for future in futures]
+
+    results = [None] * len(states)
+    start_barrier = threading.Barrier(len(states))
+
+    def worker(slot, state):
+        results[slot] = run_stream(state, loop_delay, duration, layout, start_barrier)
+
+    threads = [threading.Thread(target=worker, args=(slot, state)) for slot, state in enumerate(states)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def print_report(args, results, hubs, elapsed, process_cpu):
+    print(f"\nDistribución: {args.layout} | controles: {args.controllers} | hubs: {args.hubs} | "
+          f"pausa: {args.loop_delay} ms | duración: {elapsed:.1f}s")
+    print(f"{'flujo':>5} {'hub':>4} {'periodo':>9} {'p99':>8} {'max':>8} {'jitter':>8} "
+          f"{'cmd/s':>7} {'rtt':>7} {'errores':>7} {'perdidas':>8} {'eventos':>7} {'cpu%':>6}")
+    for r in results:
+        hub = str(r['stream']) if r['hub'] else '-'
+        print(f"{r['stream']:>5} {hub:>4} {r['period_mean_ms']:>7.2f}ms {r['period_p99_ms']:>6.2f}ms "
+              f"{r['period_max_ms']:>6.2f}ms {r['jitter_ms']:>6.2f}ms {r['command_rate']:>7.1f} "
+              f"{r['rtt_mean_ms']:>5.2f}ms {r['command_errors']:>7} {r['dropped']:>8} "
+              f"{r['monitor_events']:>7} {r['cpu_percent']:>6.2f}")
+
+    total_commands = sum(r['commands'] for r in results)
+    total_dropped = sum(r['dropped'] for r in results)
+    worst_p99 = max((r['period_p99_ms'] for r in results), default=0.0)
+    mean_jitter = sum(r['jitter_ms'] for r in results) / len(results) if results else 0.0
+    print(f"\nTotal: {total_commands / elapsed:.1f} comandos/s, {total_dropped} actualizaciones perdidas, "
+          f"jitter medio {mean_jitter:.2f}ms, peor p99 {worst_p99:.2f}ms")
+    print(f"CPU de flujos: {sum(r['cpu_s'] for r in results):.2f}s | "
+          f"CPU del arnés (incl. procesos de flujos, sin hubs): {process_cpu:.2f}s | "
+          f"CPU de hubs emulados: {hubs.cpu_time:.2f}s")
+    if hubs.commands_received:
+        print(f"Comandos recibidos por hub: {hubs.commands_received}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arnés de carga: N controles sintéticos y M Spike Hubs emulados.")
+    parser.add_argument('--controllers', type=int, default=4, help="Número de controles sintéticos (N)")
+    parser.add_argument('--hubs', type=int, default=1, help="Número de hubs emulados (M <= N); los primeros M controles mueven un motor")
+    parser.add_argument('--loop-delay', type=float, default=1000.0 * LOOP_DELAY, help="Pausa fija del bucle de cada flujo (ms), como LOOP_DELAY del script")
+    parser.add_argument('--duration', type=float, default=10.0, help="Segundos de medición")
+    parser.add_argument('--layout', choices=LAYOUTS, default='thread', help="Un hilo por flujo, un proceso por flujo o un único bucle asyncio")
+    parser.add_argument('--hub-delay', type=float, default=0.0, help="Retardo de respuesta del hub emulado (ms)")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla de los controles sintéticos")
+    parser.add_argument('--json', metavar='RUTA', help="Guardar los resultados por flujo en un archivo JSON")
+    args = parser.parse_args()
+
+    if args.controllers < 1 or args.loop_delay <= 0 or args.duration <= 0:
+        parser.error("--controllers, --loop-delay y --duration deben ser positivos")
+    if not 0 <= args.hubs <= args.controllers:
+        parser.error("--hubs debe estar entre 0 y --controllers")
+
+    hubs = FakeHubServer(args.hubs, args.hub_delay / 1000.0)
+    hubs.start()
+    print(f"Calibrando {args.controllers} controles sintéticos...")
+    states = [StreamState(i, args.seed + i, hubs.paths[i] if i < args.hubs else None)
+              for i in range(args.controllers)]
+
+    print(f"Ejecutando {args.controllers} flujos ({args.layout}) durante {args.duration}s...")
+    cpu_start = os.times()
+    start = time.monotonic()
+    try:
+        results = run_layout(args.layout, states, args.loop_delay / 1000.0, args.duration)
+    finally:
+        elapsed = time.monotonic() - start
+        hubs.stop()
+    cpu_end = os.times()
+    # usuario + sistema, propio e hijos; el proceso de los hubs se descuenta aparte
+    process_cpu = sum(cpu_end[:4]) - sum(cpu_start[:4]) - hubs.cpu_time
+
+    print_report(args, results, hubs, elapsed, process_cpu)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'elapsed_s': elapsed, 'process_cpu_s': process_cpu,
+                       'hub_cpu_s': hubs.cpu_time, 'hub_commands': hubs.commands_received,
+                       'streams': results}, f, indent=2)
+        print(f"Resultados guardados en {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import time
+import serial
+
+from xbox_config import SERIAL_TIMEOUT, REPL_PROMPT
+
+# --- Comunicación serial con el REPL del Spike Hub ---
+# La usan xbox_spike_motor_control.py y el arnés de carga (xbox_load_harness.py), así el arnés
+# mide exactamente las mismas lecturas y esperas que el script real.
+
+ERROR_INDICATORS = [b'Traceback', b'Error:']
+POLL_DELAY = 0.01 # Segundos - Pausa entre lecturas mientras se espera el prompt
+
+
+def tagged_command(command, tag=None):
+    """Línea a enviar y marca tras la que se busca el prompt.
+
+    Con tag se añade el comentario '# tag', que MicroPython ignora pero devuelve en su eco;
+    así el prompt atrasado de un comando anterior no se toma como respuesta de este.
+    """
+    if tag is None:
+        return (command + '\r\n').encode(), b'' # Usar \r\n para asegurar compatibilidad REPL
+    return f"{command} # {tag}\r\n".encode(), f"# {tag}\r\n".encode()
+
+
+def write_command(spike_serial, command, tag=None):
+    """Limpia la entrada, envía el comando y devuelve la marca de su respuesta."""
+    line, marker = tagged_command(command, tag)
+    spike_serial.reset_input_buffer() # Limpiar antes de enviar/esperar respuesta
+    spike_serial.write(line)
+    spike_serial.flush() # Asegurar que se envía
+    return marker
+
+
+def read_available(spike_serial):
+    """Lee lo que haya en el buffer sin esperar (b'' si no hay nada)."""
+    if spike_serial.in_waiting > 0:
+        chunk = spike_serial.read(spike_serial.in_waiting)
+        if chunk: # Asegurarse que no es None o vacío si read devuelve eso
+            return chunk
+    return b''
+
+
+def parse_reply(command, response, marker=b'', verbose=True):
+    """Analiza la respuesta acumulada.
+
+    Devuelve None si aún no llegó el prompt (tras la marca), o (éxito, salida antes del prompt).
+    """
+    index = response.find(marker)
+    if index < 0 or REPL_PROMPT not in response[index + len(marker):]:
+        return None
+    response_str = response.decode(errors='ignore')
+    after_marker = response[index + len(marker):].decode(errors='ignore')
+    output_before_prompt = after_marker.split(REPL_PROMPT.decode())[0] # Split decoded string
+
+    # Comprobar si hubo un error antes del prompt
+    for error_indicator_bytes in ERROR_INDICATORS:
+        error_indicator_str = error_indicator_bytes.decode(errors='ignore')
+        if error_indicator_str in output_before_prompt:
+            if verbose:
+                print(f"Error detectado en respuesta del Hub:\n{response_str}")
+            # Devolver toda la respuesta decodificada como mensaje de error
+            return False, str(response_str)
+    # Si no hubo error, devolver la salida antes del prompt
+    return True, str(output_before_prompt.strip())
+
+
+def send_spike_command(spike_serial, command, expect_prompt=True, timeout=SERIAL_TIMEOUT, tag=None, verbose=True):
+    """Envía un comando al Spike Hub y opcionalmente espera el prompt.
+
+    Con tag se espera el prompt que sigue al eco de este comando (ver tagged_command).
+    verbose=False omite los mensajes de error (el arnés de carga los cuenta en sus métricas).
+    """
+    if not spike_serial or not spike_serial.is_open:
+        if verbose:
+            print("Error: Puerto serial no está abierto.")
+        return False, "Serial port closed"
+
+    try:
+        marker = write_command(spike_serial, command, tag)
+
+        if not expect_prompt:
+            time.sleep(0.05) # Pequeña pausa si no esperamos respuesta
+            return True, "" # Return empty string for success message
+
+        # Leer respuesta hasta encontrar prompt o timeout
+        response = b""
+        start_time = time.time()
+        while time.time() - start_time < timeout:
+            try:
+                chunk = read_available(spike_serial)
+            except serial.SerialException as read_err:
+                # Error durante la lectura
+                if verbose:
+                    print(f"Error serial durante la lectura para comando '{command}': {read_err}")
+                return False, f"Serial read error: {read_err}"
+            except Exception as read_err:
+                # Otro error durante la lectura
+                if verbose:
+                    print(f"Error inesperado durante la lectura para comando '{command}': {read_err}")
+                return False, f"Unexpected read error: {read_err}"
+
+            if chunk:
+                response += chunk
+                reply = parse_reply(command, response, marker, verbose)
+                if reply is not None:
+                    return reply
+            time.sleep(POLL_DELAY) # Pequeña pausa para no saturar CPU
+
+        # Timeout case:
+        timeout_msg = response.decode(errors='ignore')
+        if verbose:
+            print(f"Timeout esperando prompt para comando: {command}")
+            print(f"Respuesta parcial recibida: {timeout_msg}")
+        return False, str(timeout_msg) # Asegurar string
+
+    except serial.SerialException as e:
+        if verbose:
+            print(f"Error serial al enviar/recibir comando '{command}': {e}")
+        return False, str(e) # str(e) es seguro
+    except Exception as e:
+        # Captura cualquier otra excepción
+        error_details = f"Unexpected error type: {type(e)}, content: {e}"
+        if verbose:
+            print(f"Error inesperado en send_spike_command ({command}): {error_details}")
+        return False, f"Caught Exception in send_spike_command: {error_details}"
@@ -0,0 +1,199 @@
+import socket
+import select
+import struct
+import time
+import random
+from collections import deque
+
+# --- Protocolo UDP del control remoto ---
+# Cada datagrama lleva el estado MÁS RECIENTE de los gatillos (no un delta), así
+# que perder uno no importa: el siguiente lo reemplaza. El emisor además envía
+# cada estado UDP_REDUNDANCY veces y retransmite a tasa fija aunque no haya
+# cambios, de modo que el receptor siempre tiene el último estado disponible.
+#
+# Formato (big-endian, 23 bytes):
+#   magic (2s) | versión (B) | sesión (I) | secuencia (I) | t_envío (d) | LT (h) | RT (h)
+# Los gatillos viajan en escala de eje (-1.0 suelto a 1.0 presionado) escalados a int16, ya
+# calibrados por el emisor: normalizados desde su reposo real y con la zona muerta aplicada
+# (dentro de ella se envía -1.0). El receptor solo los convierte a velocidad, sin otro umbral.
+PACKET_MAGIC = b'XS'
+PACKET_VERSION = 1
+PACKET_FORMAT = '!2sBIIdhh'
+PACKET_SIZE = struct.calcsize(PACKET_FORMAT)
+AXIS_SCALE = 32767
+SEQ_MODULO = 2 ** 32
+
+DEFAULT_UDP_PORT = 5005
+LATENCY_WINDOW = 1000 # Número de muestras de latencia guardadas para estadísticas
+MISSING_WINDOW = 256 # Secuencias faltantes recordadas para reconocer paquetes que llegan tarde
+
+
+def new_session_id():
+    """Identificador aleatorio del emisor; permite al receptor detectar reinicios."""
+    return random.getrandbits(32)
+
+
+def _axis_to_int(value):
+    return max(-AXIS_SCALE, min(AXIS_SCALE, int(round(value * AXIS_SCALE))))
+
+
+def pack_state(session_id, seq, left_trigger_raw, right_trigger_raw, sent_time=None):
+    """Empaqueta el estado de los gatillos en un datagrama."""
+    if sent_time is None:
+        sent_time = time.time()
+    return struct.pack(PACKET_FORMAT, PACKET_MAGIC, PACKET_VERSION,
+                       session_id, seq % SEQ_MODULO, sent_time,
+                       _axis_to_int(left_trigger_raw), _axis_to_int(right_trigger_raw))
+
+
+def unpack_state(data):
+    """Devuelve (sesión, secuencia, t_envío, lt_raw, rt_raw) o None si el paquete no es válido."""
+    if len(data) != PACKET_SIZE:
+        return None
+    magic, version, session_id, seq, sent_time, lt, rt = struct.unpack(PACKET_FORMAT, data)
+    if magic != PACKET_MAGIC or version != PACKET_VERSION:
+        return None
+    return session_id, seq, sent_time, lt / AXIS_SCALE, rt / AXIS_SCALE
+
+
+def seq_newer(seq, reference):
+    """True si seq es posterior a reference (aritmética modular, tolera el desborde)."""
+    diff = (seq - reference) % SEQ_MODULO
+    return 0 < diff < SEQ_MODULO // 2
+
+
+class UdpTriggerReceiver:
+    """Recibe estados de gatillos por UDP, descarta paquetes viejos y lleva estadísticas.
+
+    Solo se sigue a un emisor (sesión) a la vez: otra sesión se adopta únicamente cuando
+    la actual dejó de enviar (is_stale), así un paquete atrasado de un emisor anterior o un
+    segundo emisor en el mismo puerto no pueden cambiar el estado.
+
+    "Perdidos" son secuencias que nunca llegaron; "fuera de orden" son las que llegaron
+    después de una más reciente (se descartan, pero ya no cuentan como perdidas).
+
+    La latencia de un sentido se calcula como t_recepción - t_envío con time.time(),
+    así que solo es exacta en localhost o si ambos equipos tienen el reloj sincronizado (NTP).
+    """
+
+    def __init__(self, host='0.0.0.0', port=DEFAULT_UDP_PORT, timeout=0.25):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.timeout = timeout
+
+        # Último estado aceptado (reposo hasta recibir algo)
+        self.triggers = (-1.0, -1.0)
+        self.session_id = None
+        self.last_seq = None
+        self.last_packet_time = None # time.monotonic() del último paquete aceptado
+        self.missing = set() # Secuencias saltadas de la sesión actual que aún pueden llegar tarde
+
+        # Estadísticas (ventana desde el último reset_stats)
+        self.accepted = 0
+        self.lost = 0
+        self.duplicates = 0
+        self.out_of_order = 0
+        self.invalid = 0
+        self.other_sessions = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def wait(self, timeout):
+        """Bloquea hasta que llegue un datagrama o pase timeout (en vez de time.sleep)."""
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        return bool(readable)
+
+    def poll(self):
+        """Vacía el socket y procesa todos los datagramas pendientes. Devuelve True si hubo estado nuevo."""
+        updated = False
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(64)
+            except (BlockingIOError, InterruptedError):
+                break
+            if self._handle(data, time.time()):
+                updated = True
+        return updated
+
+    def _handle(self, data, recv_time):
+        packet = unpack_state(data)
+        if packet is None:
+            self.invalid += 1
+            return False
+        session_id, seq, sent_time, lt_raw, rt_raw = packet
+
+        if session_id != self.session_id:
+            if self.session_id is not None and not self.is_stale():
+                # Paquete atrasado de un emisor anterior u otro emisor en el puerto
+                self.other_sessions += 1
+                return False
+            # Primer emisor, o emisor nuevo/reiniciado tras el timeout: la secuencia vuelve a empezar
+            if self.session_id is not None:
+                print(f"UDP: nueva sesión del emisor ({session_id:08x}).")
+            self.session_id = session_id
+            self.missing.clear()
+        elif seq == self.last_seq:
+            self.duplicates += 1 # Copia redundante esperada
+            return False
+        elif not seq_newer(seq, self.last_seq):
+            if seq in self.missing:
+                # Llegó tarde: no se perdió, pero ya tenemos un estado más reciente
+                self.missing.discard(seq)
+                self.lost -= 1
+                self.out_of_order += 1
+            else:
+                self.duplicates += 1 # Copia de un paquete ya contado
+            return False
+        else:
+            gap = (seq - self.last_seq) % SEQ_MODULO - 1
+            self.lost += gap
+            if gap <= MISSING_WINDOW:
+                self.missing.update((self.last_seq + i) % SEQ_MODULO for i in range(1, gap + 1))
+            if len(self.missing) > MISSING_WINDOW:
+                self.missing = {s for s in self.missing if (seq - s) % SEQ_MODULO <= MISSING_WINDOW}
+
+        self.last_seq = seq
+        self.triggers = (lt_raw, rt_raw)
+        self.last_packet_time = time.monotonic()
+        self.accepted += 1
+        self.latencies.append(recv_time - sent_time)
+        return True
+
+    def is_stale(self, now=None):
+        """True si no llegan paquetes desde hace más de timeout (o nunca llegaron)."""
+        if self.last_packet_time is None:
+            return True
+        if now is None:
+            now = time.monotonic()
+        return now - self.last_packet_time > self.timeout
+
+    def stats_summary(self):
+        """Texto con pérdida y latencia de un sentido de la ventana actual."""
+        expected = self.accepted + self.lost + self.out_of_order
+        loss_pct = (100.0 * self.lost / expected) if expected else 0.0
+        summary = (f"UDP: recibidos={self.accepted}, perdidos={self.lost} ({loss_pct:.1f}%), "
+                   f"duplicados={self.duplicates}, fuera de orden={self.out_of_order}")
+        if self.invalid:
+            summary += f", inválidos={self.invalid}"
+        if self.other_sessions:
+            summary += f", de otra sesión={self.other_sessions}"
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            mean_ms = 1000.0 * sum(ordered) / len(ordered)
+            p95_ms = 1000.0 * ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            max_ms = 1000.0 * ordered[-1]
+            summary += f", latencia media={mean_ms:.2f}ms p95={p95_ms:.2f}ms max={max_ms:.2f}ms"
+        return summary
+
+    def reset_stats(self):
+        self.accepted = 0
+        self.lost = 0
+        self.duplicates = 0
+        self.out_of_order = 0
+        self.invalid = 0
+        self.other_sessions = 0
+        self.missing.clear() # Los que lleguen tarde de la ventana anterior cuentan como duplicados
+        self.latencies.clear()
+
+    def close(self):
+        self.sock.close()
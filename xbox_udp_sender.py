@@ -0,0 +1,135 @@
+import pygame # type: ignore
+import socket
+import time
+import os
+import sys
+
+from xbox_config import AXIS_LEFT_TRIGGER, AXIS_RIGHT_TRIGGER, MOTOR_TRIGGER_THRESHOLD
+from xbox_control_logic import normalize_trigger
+from xbox_calibration import AxisCalibration, calibrate_joystick, print_calibration, CALIBRATION_DURATION
+from xbox_udp_remote import pack_state, new_session_id, DEFAULT_UDP_PORT
+
+# --- Configuraciones ---
+# Red (el receptor es xbox_spike_motor_control.py con INPUT_SOURCE = 'udp')
+UDP_TARGET_HOST = '127.0.0.1' # IP del equipo conectado al Spike Hub (se puede pasar como argumento)
+UDP_PORT = DEFAULT_UDP_PORT
+SEND_RATE_HZ = 100 # Estados por segundo; se envían aunque no haya cambios (sirve de latido)
+UDP_REDUNDANCY = 2 # Copias de cada datagrama, para tolerar pérdidas sueltas
+FINAL_REST_PACKETS = 5 # Estados de reposo enviados al salir para parar el motor de inmediato
+STATS_INTERVAL = 5.0 # Segundos entre reportes de envío
+
+# Pygame / Xbox Controller
+os.environ['SDL_VIDEODRIVER'] = 'dummy' # Para ejecución sin pantalla
+CALIBRATION_ENABLED = True # Calibrar reposo y zona muerta de los gatillos antes de enviar
+CALIBRATION_USE_CACHE = False # Reutilizar la calibración guardada de este control (--recalibrate fuerza una nueva)
+
+hosts = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+if hosts:
+    UDP_TARGET_HOST = hosts[0]
+
+# --- Inicialización Pygame ---
+print("Inicializando Pygame...")
+pygame.init()
+pygame.joystick.init()
+pygame.display.set_mode((1, 1)) # Necesario para el bucle de eventos
+
+print("Detectando control...")
+if pygame.joystick.get_count() == 0:
+    print("Error: No se detectaron controles.")
+    pygame.quit()
+    exit()
+
+joystick = pygame.joystick.Joystick(0)
+joystick.init()
+print(f"Usando control: {joystick.get_name()}")
+if joystick.get_numaxes() <= max(AXIS_LEFT_TRIGGER, AXIS_RIGHT_TRIGGER):
+    print(f"Error: El control no tiene suficientes ejes ({joystick.get_numaxes()}) para los gatillos configurados (LT:{AXIS_LEFT_TRIGGER}, RT:{AXIS_RIGHT_TRIGGER}).")
+    pygame.quit()
+    exit()
+
+# --- Calibración de Gatillos ---
+# Se envían los gatillos ya calibrados (reposo en -1.0 y ruido dentro de la zona muerta eliminado),
+# así el receptor no necesita conocer este control
+if CALIBRATION_ENABLED:
+    print(f"Calibrando ejes durante {CALIBRATION_DURATION}s, no toques el control...")
+    calibration, from_cache = calibrate_joystick(joystick, pump=pygame.event.pump,
+                                                 use_cache=CALIBRATION_USE_CACHE,
+                                                 recalibrate='--recalibrate' in sys.argv)
+    print_calibration(calibration, from_cache)
+else:
+    calibration = AxisCalibration.uncalibrated(joystick.get_numaxes())
+trigger_rests = (calibration.trigger_rest(AXIS_LEFT_TRIGGER), calibration.trigger_rest(AXIS_RIGHT_TRIGGER))
+trigger_deadzones = (calibration.trigger_deadzone(AXIS_LEFT_TRIGGER, MOTOR_TRIGGER_THRESHOLD),
+                     calibration.trigger_deadzone(AXIS_RIGHT_TRIGGER, MOTOR_TRIGGER_THRESHOLD))
+
+def calibrated_trigger_raw(value, rest, deadzone):
+    """Reescala el gatillo a -1.0 (suelto) .. 1.0 usando el reposo calibrado y aplica la zona muerta."""
+    normalized = normalize_trigger(value, rest)
+    return -1.0 + 2.0 * normalized if normalized > deadzone else -1.0
+
+# --- Inicialización UDP ---
+target = (UDP_TARGET_HOST, UDP_PORT)
+udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+session_id = new_session_id()
+seq = 0
+send_period = 1.0 / SEND_RATE_HZ
+print(f"Enviando gatillos a {UDP_TARGET_HOST}:{UDP_PORT} a {SEND_RATE_HZ} Hz (x{UDP_REDUNDANCY}, sesión {session_id:08x}).")
+
+def send_state(left_trigger_raw, right_trigger_raw):
+    """Envía el estado actual con un número de secuencia nuevo (y sus copias redundantes)."""
+    global seq
+    seq += 1
+    packet = pack_state(session_id, seq, left_trigger_raw, right_trigger_raw)
+    for _ in range(UDP_REDUNDANCY):
+        try:
+            udp_socket.sendto(packet, target)
+        except OSError as e:
+            print(f"Error enviando datagrama: {e}")
+            return
+
+# --- Bucle Principal ---
+print("Iniciando envío. Presiona Ctrl+C para salir.")
+next_send_time = time.monotonic()
+last_stats_time = next_send_time
+last_stats_seq = seq
+try:
+    while True:
+        pygame.event.pump()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                raise KeyboardInterrupt
+
+        try:
+            left_trigger_raw = calibrated_trigger_raw(joystick.get_axis(AXIS_LEFT_TRIGGER), trigger_rests[0], trigger_deadzones[0])
+            right_trigger_raw = calibrated_trigger_raw(joystick.get_axis(AXIS_RIGHT_TRIGGER), trigger_rests[1], trigger_deadzones[1])
+        except pygame.error as e:
+            print(f"Error leyendo ejes del joystick: {e}. ¿Control desconectado?")
+            break
+
+        send_state(left_trigger_raw, right_trigger_raw)
+
+        now = time.monotonic()
+        if now - last_stats_time >= STATS_INTERVAL:
+            rate = (seq - last_stats_seq) / (now - last_stats_time)
+            print(f"UDP: {rate:.1f} estados/s enviados (secuencia {seq})")
+            last_stats_time = now
+            last_stats_seq = seq
+
+        # Espera hasta el siguiente periodo; si nos atrasamos, no intentamos recuperar ráfagas
+        next_send_time += send_period
+        delay = next_send_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_send_time = time.monotonic()
+
+except KeyboardInterrupt:
+    print("\nInterrupción por teclado detectada. Deteniendo...")
+finally:
+    # Gatillos en reposo para que el receptor pare el motor sin esperar al timeout
+    for _ in range(FINAL_REST_PACKETS):
+        send_state(-1.0, -1.0)
+        time.sleep(send_period)
+    udp_socket.close()
+    pygame.quit()
+    print("Emisor finalizado.")